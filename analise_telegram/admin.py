@@ -1,16 +1,61 @@
 # analise_telegram/admin.py
 from django.contrib import admin
-from .models import CanalTelegram, MensagemTelegram
+from django.utils import timezone
+from .models import CanalTelegram, MensagemTelegram, MidiaTelegram, ResolucaoCanal, RotuloRisco
+
+class PrimarioModelAdmin(admin.ModelAdmin):
+    """
+    O admin lê sempre do banco primário (e não da réplica), para que a listagem e
+    os formulários exibidos logo após um salvamento não mostrem dados defasados.
+    """
+    def get_queryset(self, request):
+        return super().get_queryset(request).using('default')
 
 @admin.register(CanalTelegram)
-class CanalTelegramAdmin(admin.ModelAdmin):
-    list_display = ('nome', 'username', 'telegram_id', 'ativo', 'data_adicao', 'ultimo_processamento')
+class CanalTelegramAdmin(PrimarioModelAdmin):
+    list_display = ('nome', 'username', 'telegram_id', 'ativo', 'data_adicao', 'ultimo_processamento', 'taxa_postagem', 'taxa_risco', 'proxima_coleta')
     search_fields = ('nome', 'username')
     list_filter = ('ativo', 'data_adicao')
 
 @admin.register(MensagemTelegram)
-class MensagemTelegramAdmin(admin.ModelAdmin):
+class MensagemTelegramAdmin(PrimarioModelAdmin):
     list_display = ('canal', 'mensagem_id', 'data_publicacao', 'tipo_midia', 'eh_risco', 'sentimento')
     list_filter = ('canal', 'eh_risco', 'tipo_midia', 'sentimento', 'data_publicacao')
     search_fields = ('texto',)
-    raw_id_fields = ('canal',) # Útil para selecionar canais em vez de dropdown grande
\ No newline at end of file
+    raw_id_fields = ('canal', 'midia') # Útil para selecionar canais em vez de dropdown grande
+    actions = ['marcar_como_risco', 'marcar_como_nao_risco']
+
+    def _registrar_rotulo(self, request, queryset, eh_risco):
+        # Cada correção vira um RotuloRisco, consumido depois pelo treinamento incremental (analise_ia.py)
+        RotuloRisco.objects.bulk_create(
+            [RotuloRisco(mensagem=mensagem, eh_risco=eh_risco, analista=request.user) for mensagem in queryset]
+        )
+        # update() não aciona o auto_now, então atualizado_em é ajustado manualmente
+        total = queryset.update(eh_risco=eh_risco, atualizado_em=timezone.now())
+        self.message_user(request, f"{total} mensagem(ns) rotulada(s) para o treinamento do modelo de risco.")
+
+    @admin.action(description="Corrigir: marcar como risco")
+    def marcar_como_risco(self, request, queryset):
+        self._registrar_rotulo(request, queryset, True)
+
+    @admin.action(description="Corrigir: marcar como não risco")
+    def marcar_como_nao_risco(self, request, queryset):
+        self._registrar_rotulo(request, queryset, False)
+
+@admin.register(MidiaTelegram)
+class MidiaTelegramAdmin(PrimarioModelAdmin):
+    list_display = ('file_unique_id', 'tipo', 'mime_type', 'tamanho', 'arquivo', 'data_download')
+    list_filter = ('tipo', 'mime_type')
+    search_fields = ('file_unique_id', 'sha256')
+
+@admin.register(RotuloRisco)
+class RotuloRiscoAdmin(PrimarioModelAdmin):
+    list_display = ('mensagem', 'eh_risco', 'analista', 'data_criacao', 'usado_no_treino')
+    list_filter = ('eh_risco', 'usado_no_treino', 'data_criacao')
+    raw_id_fields = ('mensagem',)
+
+@admin.register(ResolucaoCanal)
+class ResolucaoCanalAdmin(PrimarioModelAdmin):
+    list_display = ('chave', 'telegram_id', 'username', 'titulo', 'erro', 'data_resolucao')
+    list_filter = ('data_resolucao',)
+    search_fields = ('chave', 'username', 'titulo')
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class AnaliseTelegramConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'analise_telegram'
+
+    def ready(self):
+        from . import signals  # noqa: F401 (registra os receivers)
@@ -0,0 +1,216 @@
+# analise_telegram/management/commands/importar_canais.py
+import asyncio
+import re
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from pyrogram import Client
+from pyrogram.errors import BadRequest, FloodWait
+
+from analise_telegram.models import CanalTelegram, ResolucaoCanal
+
+# Usernames públicos do Telegram: 4 a 32 caracteres, começando por letra (só dígitos seria um ID numérico)
+USERNAME_REGEX = re.compile(r'^[a-z][a-z0-9_]{3,31}$')
+LINK_REGEX = re.compile(r'^(?:https?://)?(?:t|telegram)\.me/(.+)$', re.IGNORECASE)
+
+# Caminhos de t.me que não são usernames (pastas, stickers, proxies, links privados...)
+CAMINHOS_RESERVADOS = {
+    'addlist', 'addstickers', 'addemoji', 'addtheme', 'share', 'proxy', 'socks',
+    'setlanguage', 'login', 'confirmphone', 'bg', 'c', 'iv', 'boost', 'contact',
+    'invoice', 'm', 'giftcode', 'nft',
+}
+
+# Falhas definitivas (username inexistente, prévia de convite sem ID) ficam em cache
+# só por este período; depois são consultadas de novo numa próxima importação
+TTL_CACHE_NEGATIVO = timedelta(days=7)
+
+# Tamanho dos blocos de consulta ao cache no banco (limite de parâmetros do SQLite)
+TAMANHO_BLOCO_CACHE = 500
+
+
+def normalizar_chave(entrada):
+    """
+    Converte '@Canal', 'Canal', 't.me/Canal' ou um link de convite na chave usada
+    pelo cache de resolução. Retorna None para entradas inválidas.
+    """
+    entrada = entrada.strip()
+    link = LINK_REGEX.match(entrada)
+    if link:
+        caminho = link.group(1).strip('/')
+        if caminho.startswith('+') or caminho.lower().startswith('joinchat/'):
+            # O hash do convite diferencia maiúsculas de minúsculas, então é mantido como está
+            return f"https://t.me/{caminho}"
+        partes = caminho.split('?')[0].split('/')
+        if partes[0].lower() == 's' and len(partes) > 1:
+            partes = partes[1:] # Prévia web do canal: t.me/s/<username>
+        if partes[0].lower() in CAMINHOS_RESERVADOS:
+            return None
+        entrada = partes[0]
+    username = entrada.lstrip('@').lower()
+    return username if USERNAME_REGEX.match(username) else None
+
+
+def resolucao_valida(resolucao, agora):
+    """
+    Indica se uma resolução em cache pode ser usada sem consultar a API: as bem-sucedidas
+    valem sempre (o telegram_id não muda); as falhas expiram após TTL_CACHE_NEGATIVO.
+    """
+    if resolucao is None:
+        return False
+    if resolucao.telegram_id is not None:
+        return True
+    return resolucao.data_resolucao > agora - TTL_CACHE_NEGATIVO
+
+
+class Command(BaseCommand):
+    help = (
+        "Importa em massa canais a partir de um arquivo (um username ou link de convite por linha), "
+        "resolvendo o telegram_id com chamadas get_chat concorrentes e com limite de taxa. "
+        "As resoluções ficam em cache (ResolucaoCanal), então reimportações não consultam a API de novo; "
+        "entradas que falharam são consultadas outra vez após alguns dias."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('arquivo', help="Arquivo texto com um username (@canal) ou link t.me por linha; linhas com # são ignoradas")
+        parser.add_argument('--concorrencia', type=int, default=5, help="Número máximo de chamadas get_chat simultâneas")
+        parser.add_argument('--lote', type=int, default=50, help="Quantidade de canais resolvidos por lote")
+        parser.add_argument('--intervalo', type=float, default=2.0, help="Pausa em segundos entre lotes, para respeitar os limites da API")
+        parser.add_argument('--ignorar-cache', action='store_true', help="Consulta a API mesmo para entradas já resolvidas em cache")
+
+    def handle(self, *args, **options):
+        try:
+            with open(options['arquivo'], encoding='utf-8') as f:
+                linhas = [linha.strip() for linha in f if linha.strip() and not linha.strip().startswith('#')]
+        except OSError as e:
+            raise CommandError(f"Não foi possível ler o arquivo: {e}")
+
+        # dict preserva a ordem do arquivo e remove duplicatas
+        chaves = {}
+        invalidas = 0
+        for linha in linhas:
+            chave = normalizar_chave(linha)
+            if chave:
+                chaves[chave] = None
+            else:
+                invalidas += 1
+                self.stderr.write(f"Entrada inválida ignorada: {linha}")
+        chaves = list(chaves)
+
+        # Consulta o cache no primário, que é onde as resoluções são gravadas
+        cache = {}
+        for i in range(0, len(chaves), TAMANHO_BLOCO_CACHE):
+            bloco = chaves[i:i + TAMANHO_BLOCO_CACHE]
+            for resolucao in ResolucaoCanal.objects.using('default').filter(chave__in=bloco):
+                cache[resolucao.chave] = resolucao
+
+        agora = timezone.now()
+        if options['ignorar_cache']:
+            pendentes = chaves
+        else:
+            pendentes = [chave for chave in chaves if not resolucao_valida(cache.get(chave), agora)]
+        self.stdout.write(f"{len(chaves)} entradas únicas, {len(chaves) - len(pendentes)} já resolvidas em cache, {len(pendentes)} a consultar.")
+
+        if pendentes:
+            resultados = asyncio.run(self._resolver(pendentes, options['concorrencia'], options['lote'], options['intervalo']))
+            with transaction.atomic():
+                for resultado in resultados:
+                    if resultado is None:
+                        continue # Falha temporária: não entra no cache, será tentada na próxima importação
+                    chave = resultado.pop('chave')
+                    cache[chave], _ = ResolucaoCanal.objects.update_or_create(chave=chave, defaults=resultado)
+
+        criados = atualizados = existentes = falhas = 0
+        with transaction.atomic():
+            for chave in chaves:
+                resolucao = cache.get(chave)
+                if resolucao is None or resolucao.telegram_id is None:
+                    falhas += 1
+                    continue
+                try:
+                    # Savepoint por canal: uma falha não desfaz os demais
+                    with transaction.atomic():
+                        status = self._registrar_canal(chave, resolucao)
+                except IntegrityError as e:
+                    falhas += 1
+                    self.stderr.write(f"Não foi possível registrar o canal {chave}: {e}")
+                    continue
+                if status == 'criado':
+                    criados += 1
+                elif status == 'atualizado':
+                    atualizados += 1
+                else:
+                    existentes += 1
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Importação concluída: {criados} canais criados, {atualizados} atualizados, "
+            f"{existentes} já existentes, {falhas} não resolvidos, {invalidas} entradas inválidas."
+        ))
+
+    async def _resolver(self, pendentes, concorrencia, tamanho_lote, intervalo):
+        """
+        Resolve as chaves pendentes em lotes, com no máximo `concorrencia` chamadas simultâneas.
+        """
+        semaforo = asyncio.Semaphore(concorrencia)
+        resultados = []
+        async with Client(settings.TELEGRAM_SESSION_NAME, api_id=settings.TELEGRAM_API_ID, api_hash=settings.TELEGRAM_API_HASH) as app:
+            for i in range(0, len(pendentes), tamanho_lote):
+                lote = pendentes[i:i + tamanho_lote]
+                resultados.extend(await asyncio.gather(*(self._resolver_chave(app, semaforo, chave) for chave in lote)))
+                self.stdout.write(f"Resolvidos {min(i + tamanho_lote, len(pendentes))}/{len(pendentes)}")
+                if i + tamanho_lote < len(pendentes):
+                    await asyncio.sleep(intervalo)
+        return resultados
+
+    async def _resolver_chave(self, app, semaforo, chave, tentativas=3):
+        """
+        Chama get_chat para uma chave. Erros definitivos (BadRequest) são devolvidos
+        para o cache; falhas temporárias devolvem None.
+        """
+        async with semaforo:
+            for _ in range(tentativas):
+                try:
+                    chat = await app.get_chat(chave)
+                except FloodWait as e:
+                    self.stderr.write(f"FloodWait ao resolver {chave}: aguardando {e.value}s")
+                    await asyncio.sleep(e.value)
+                    continue
+                except BadRequest as e:
+                    return {'chave': chave, 'telegram_id': None, 'username': None, 'titulo': None, 'erro': (getattr(e, 'ID', None) or str(e))[:255]}
+                except Exception as e:
+                    self.stderr.write(f"Erro ao resolver {chave}: {e}")
+                    return None
+
+                telegram_id = getattr(chat, 'id', None)
+                if telegram_id is None:
+                    # Links de convite de canais em que a conta não está só devolvem uma prévia, sem ID
+                    return {'chave': chave, 'telegram_id': None, 'username': None, 'titulo': getattr(chat, 'title', None), 'erro': 'PREVIA_SEM_ID'}
+                return {'chave': chave, 'telegram_id': telegram_id, 'username': chat.username, 'titulo': chat.title, 'erro': None}
+            return None
+
+    def _registrar_canal(self, chave, resolucao):
+        """
+        Cria o CanalTelegram, ou atualiza o username de um canal já existente.
+        O canal é identificado pelo telegram_id, que não muda quando o username muda.
+        """
+        canal = CanalTelegram.objects.using('default').filter(telegram_id=resolucao.telegram_id).first()
+        if canal:
+            if resolucao.username and canal.username != resolucao.username:
+                canal.username = resolucao.username
+                canal.save(update_fields=['username', 'atualizado_em'])
+                return 'atualizado'
+            return 'existente'
+
+        nome = (resolucao.titulo or resolucao.username or str(resolucao.telegram_id))[:230]
+        if CanalTelegram.objects.using('default').filter(nome=nome).exists():
+            # nome é único: canais homônimos são diferenciados pelo ID
+            nome = f"{nome} ({resolucao.telegram_id})"
+        CanalTelegram.objects.create(
+            nome=nome,
+            username=resolucao.username,
+            telegram_id=resolucao.telegram_id,
+            link_convite=chave if chave.startswith('https://') else None,
+        )
+        return 'criado'
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.5 on 2026-10-19 10:12
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analise_telegram', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='canaltelegram',
+            name='atualizado_em',
+            field=models.DateTimeField(auto_now=True, db_index=True, default=django.utils.timezone.now, help_text='Data da última alteração do registro (usada como carimbo de versão do cache)'),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='mensagemtelegram',
+            name='atualizado_em',
+            field=models.DateTimeField(auto_now=True, db_index=True, default=django.utils.timezone.now, help_text='Data da última alteração do registro (usada como carimbo de versão do cache)'),
+            preserve_default=False,
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.5 on 2026-10-19 11:02
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analise_telegram', '0002_atualizado_em'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RotuloRisco',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('eh_risco', models.BooleanField(help_text='Classificação correta de risco informada pelo analista')),
+                ('data_criacao', models.DateTimeField(auto_now_add=True, help_text='Data em que o rótulo foi registrado')),
+                ('usado_no_treino', models.BooleanField(db_index=True, default=False, help_text='Indica se o rótulo já foi consumido pelo treinamento incremental do modelo')),
+                ('analista', models.ForeignKey(blank=True, help_text='Usuário que fez a correção', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='rotulos_risco', to=settings.AUTH_USER_MODEL)),
+                ('mensagem', models.ForeignKey(help_text='Mensagem rotulada pelo analista', on_delete=django.db.models.deletion.CASCADE, related_name='rotulos', to='analise_telegram.mensagemtelegram')),
+            ],
+            options={
+                'verbose_name': 'Rótulo de Risco',
+                'verbose_name_plural': 'Rótulos de Risco',
+                'ordering': ['-data_criacao'],
+            },
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.5 on 2026-10-19 11:48
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analise_telegram', '0003_rotulorisco'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MidiaTelegram',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('file_unique_id', models.CharField(help_text='Identificador único e estável do arquivo no Telegram', max_length=255, unique=True)),
+                ('tipo', models.CharField(help_text='Tipo de mídia (e.g., photo, video, document)', max_length=50)),
+                ('tamanho', models.BigIntegerField(blank=True, help_text='Tamanho do arquivo em bytes', null=True)),
+                ('mime_type', models.CharField(blank=True, help_text='MIME type do arquivo (quando informado pelo Telegram)', max_length=100, null=True)),
+                ('sha256', models.CharField(blank=True, db_index=True, help_text='Hash SHA-256 do conteúdo baixado', max_length=64, null=True)),
+                ('arquivo', models.CharField(blank=True, help_text='Caminho do arquivo no armazenamento local, relativo ao diretório de mídia', max_length=500, null=True)),
+                ('data_download', models.DateTimeField(blank=True, help_text='Data em que o arquivo foi baixado', null=True)),
+            ],
+            options={
+                'verbose_name': 'Mídia do Telegram',
+                'verbose_name_plural': 'Mídias do Telegram',
+            },
+        ),
+        migrations.AddField(
+            model_name='mensagemtelegram',
+            name='midia',
+            field=models.ForeignKey(blank=True, help_text='Arquivo de mídia anexado à mensagem (se houver)', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='mensagens', to='analise_telegram.midiatelegram'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.5 on 2026-10-19 12:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analise_telegram', '0004_midiatelegram'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='canaltelegram',
+            name='taxa_postagem',
+            field=models.FloatField(default=0, help_text='Média de mensagens por hora na janela recente (calculada a partir de data_publicacao)'),
+        ),
+        migrations.AddField(
+            model_name='canaltelegram',
+            name='taxa_risco',
+            field=models.FloatField(default=0, help_text='Fração das mensagens recentes classificadas como de risco'),
+        ),
+        migrations.AddField(
+            model_name='canaltelegram',
+            name='proxima_coleta',
+            field=models.DateTimeField(blank=True, db_index=True, help_text='Quando o canal deve ser consultado novamente pelo coletor', null=True),
+        ),
+    ]
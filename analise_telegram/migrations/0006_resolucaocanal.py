@@ -0,0 +1,30 @@
+# Generated by Django 5.2.5 on 2026-10-19 13:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analise_telegram', '0005_agendamento_canal'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResolucaoCanal',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('chave', models.CharField(help_text='Username normalizado (sem @, minúsculo) ou link de convite', max_length=500, unique=True)),
+                ('telegram_id', models.BigIntegerField(blank=True, db_index=True, help_text='ID numérico do canal resolvido (vazio se a resolução falhou)', null=True)),
+                ('username', models.CharField(blank=True, help_text='Username atual do canal no momento da resolução', max_length=255, null=True)),
+                ('titulo', models.CharField(blank=True, help_text='Título do canal no momento da resolução', max_length=255, null=True)),
+                ('erro', models.CharField(blank=True, help_text='Erro definitivo retornado pela API (e.g., username inexistente)', max_length=255, null=True)),
+                ('data_resolucao', models.DateTimeField(auto_now=True, help_text='Data da última consulta à API para esta chave')),
+            ],
+            options={
+                'verbose_name': 'Resolução de Canal',
+                'verbose_name_plural': 'Resoluções de Canais',
+                'ordering': ['chave'],
+            },
+        ),
+    ]
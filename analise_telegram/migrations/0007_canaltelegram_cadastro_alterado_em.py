@@ -0,0 +1,19 @@
+# Generated by Django 5.2.5 on 2026-10-19 16:48
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analise_telegram', '0006_resolucaocanal'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='canaltelegram',
+            name='cadastro_alterado_em',
+            field=models.DateTimeField(db_index=True, default=django.utils.timezone.now, help_text='Data da última criação ou renomeação do canal (versão do cache do filtro de canais)'),
+        ),
+    ]
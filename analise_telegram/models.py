@@ -1,5 +1,7 @@
 # analise_telegram/models.py
+from django.conf import settings
 from django.db import models
+from django.utils import timezone
 
 class CanalTelegram(models.Model):
     """
@@ -12,16 +14,62 @@ class CanalTelegram(models.Model):
     data_adicao = models.DateTimeField(auto_now_add=True, help_text="Data em que o canal foi adicionado ao monitoramento")
     ativo = models.BooleanField(default=True, help_text="Indica se o monitoramento do canal está ativo")
     ultimo_processamento = models.DateTimeField(blank=True, null=True, help_text="Timestamp do último processamento de mensagens deste canal")
+    # Estatísticas usadas pelo agendador adaptativo do coletor
+    taxa_postagem = models.FloatField(default=0, help_text="Média de mensagens por hora na janela recente (calculada a partir de data_publicacao)")
+    taxa_risco = models.FloatField(default=0, help_text="Fração das mensagens recentes classificadas como de risco")
+    proxima_coleta = models.DateTimeField(blank=True, null=True, db_index=True, help_text="Quando o canal deve ser consultado novamente pelo coletor")
+    atualizado_em = models.DateTimeField(auto_now=True, db_index=True, help_text="Data da última alteração do registro (usada como carimbo de versão do cache)")
+    cadastro_alterado_em = models.DateTimeField(default=timezone.now, db_index=True, help_text="Data da última criação ou renomeação do canal (versão do cache do filtro de canais)")
 
     def __str__(self):
         return self.nome
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Guarda o nome carregado para detectar renomeações no save()
+        if 'nome' in field_names:
+            instance._nome_carregado = values[field_names.index('nome')]
+        return instance
+
+    def save(self, *args, **kwargs):
+        # O filtro de canais só depende de id e nome: as coletas (ultimo_processamento,
+        # estatísticas do agendador) não devem invalidar seu cache
+        nome_carregado = getattr(self, '_nome_carregado', None)
+        if self._state.adding or (nome_carregado is not None and nome_carregado != self.nome):
+            self.cadastro_alterado_em = timezone.now()
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = {*kwargs['update_fields'], 'cadastro_alterado_em'}
+        super().save(*args, **kwargs)
+        self._nome_carregado = self.nome
+
     class Meta:
         verbose_name = "Canal do Telegram"
         verbose_name_plural = "Canais do Telegram"
         ordering = ['nome']
 
 
+class MidiaTelegram(models.Model):
+    """
+    Arquivo de mídia (foto, vídeo, documento...) anexado a mensagens do Telegram.
+    Um mesmo arquivo encaminhado em vários canais tem um único registro (file_unique_id).
+    """
+    file_unique_id = models.CharField(max_length=255, unique=True, help_text="Identificador único e estável do arquivo no Telegram")
+    tipo = models.CharField(max_length=50, help_text="Tipo de mídia (e.g., photo, video, document)")
+    tamanho = models.BigIntegerField(blank=True, null=True, help_text="Tamanho do arquivo em bytes")
+    mime_type = models.CharField(max_length=100, blank=True, null=True, help_text="MIME type do arquivo (quando informado pelo Telegram)")
+    sha256 = models.CharField(max_length=64, blank=True, null=True, db_index=True, help_text="Hash SHA-256 do conteúdo baixado")
+    arquivo = models.CharField(max_length=500, blank=True, null=True, help_text="Caminho do arquivo no armazenamento local, relativo ao diretório de mídia")
+    data_download = models.DateTimeField(blank=True, null=True, help_text="Data em que o arquivo foi baixado")
+
+    def __str__(self):
+        return f"{self.tipo} {self.file_unique_id}"
+
+    class Meta:
+        verbose_name = "Mídia do Telegram"
+        verbose_name_plural = "Mídias do Telegram"
+
+
 class MensagemTelegram(models.Model):
     """
     Representa uma mensagem coletada de um canal público do Telegram.
@@ -36,6 +84,7 @@ class MensagemTelegram(models.Model):
         null=True,
         help_text="Tipo de mídia anexada à mensagem (e.g., photo, video, text, document)"
     )
+    midia = models.ForeignKey(MidiaTelegram, on_delete=models.SET_NULL, blank=True, null=True, related_name='mensagens', help_text="Arquivo de mídia anexado à mensagem (se houver)")
     # Campos para análise de conteúdo (preenchidos por processamento posterior)
     eh_risco = models.BooleanField(default=False, help_text="Indica se a mensagem foi classificada como de risco")
     sentimento = models.CharField(
@@ -46,6 +95,7 @@ class MensagemTelegram(models.Model):
         help_text="Sentimento geral da mensagem (se aplicável)"
     )
     palavras_chave_encontradas = models.JSONField(blank=True, null=True, help_text="Lista de palavras-chave relevantes encontradas na mensagem")
+    atualizado_em = models.DateTimeField(auto_now=True, db_index=True, help_text="Data da última alteração do registro (usada como carimbo de versão do cache)")
 
     def __str__(self):
         return f"Mensagem {self.mensagem_id} de {self.canal.nome}"
@@ -55,4 +105,45 @@ class MensagemTelegram(models.Model):
         verbose_name_plural = "Mensagens do Telegram"
         # Garante que não haverá duplicidade de mensagens pelo ID do Telegram dentro do mesmo canal
         unique_together = ('canal', 'mensagem_id')
-        ordering = ['-data_publicacao']
\ No newline at end of file
+        ordering = ['-data_publicacao']
+
+
+class RotuloRisco(models.Model):
+    """
+    Correção feita por um analista sobre a classificação de risco de uma mensagem.
+    Alimenta o treinamento incremental (online) do modelo de risco.
+    """
+    mensagem = models.ForeignKey(MensagemTelegram, on_delete=models.CASCADE, related_name='rotulos', help_text="Mensagem rotulada pelo analista")
+    eh_risco = models.BooleanField(help_text="Classificação correta de risco informada pelo analista")
+    analista = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, blank=True, null=True, related_name='rotulos_risco', help_text="Usuário que fez a correção")
+    data_criacao = models.DateTimeField(auto_now_add=True, help_text="Data em que o rótulo foi registrado")
+    usado_no_treino = models.BooleanField(default=False, db_index=True, help_text="Indica se o rótulo já foi consumido pelo treinamento incremental do modelo")
+
+    def __str__(self):
+        return f"Rótulo {'risco' if self.eh_risco else 'não risco'} para {self.mensagem}"
+
+    class Meta:
+        verbose_name = "Rótulo de Risco"
+        verbose_name_plural = "Rótulos de Risco"
+        ordering = ['-data_criacao']
+
+
+class ResolucaoCanal(models.Model):
+    """
+    Cache persistente da resolução de username/link de convite para telegram_id,
+    usado pela importação em massa de canais (manage.py importar_canais).
+    """
+    chave = models.CharField(max_length=500, unique=True, help_text="Username normalizado (sem @, minúsculo) ou link de convite")
+    telegram_id = models.BigIntegerField(blank=True, null=True, db_index=True, help_text="ID numérico do canal resolvido (vazio se a resolução falhou)")
+    username = models.CharField(max_length=255, blank=True, null=True, help_text="Username atual do canal no momento da resolução")
+    titulo = models.CharField(max_length=255, blank=True, null=True, help_text="Título do canal no momento da resolução")
+    erro = models.CharField(max_length=255, blank=True, null=True, help_text="Erro definitivo retornado pela API (e.g., username inexistente)")
+    data_resolucao = models.DateTimeField(auto_now=True, help_text="Data da última consulta à API para esta chave")
+
+    def __str__(self):
+        return f"{self.chave} -> {self.telegram_id or self.erro}"
+
+    class Meta:
+        verbose_name = "Resolução de Canal"
+        verbose_name_plural = "Resoluções de Canais"
+        ordering = ['chave']
\ No newline at end of file
@@ -0,0 +1,35 @@
+# analise_telegram/routers.py
+from django.conf import settings
+
+# Apps cujos modelos podem ser lidos da réplica pelas views
+APPS_NA_REPLICA = {'analise_telegram'}
+
+
+class PrimaryReplicaRouter:
+    """
+    Envia as escritas (coletor e análise de IA) para o banco primário e as
+    leituras dos modelos do observatório feitas pelas views para a réplica,
+    quando ela estiver configurada.
+    """
+
+    def db_for_read(self, model, **hints):
+        # Sessões, autenticação e admin (apps do Django) ficam sempre no primário: logo
+        # após um login a sessão ainda pode não ter chegado à réplica (atraso de replicação).
+        # Processos de ingestão também leem do primário para enxergar o que acabaram de gravar.
+        if (
+            model._meta.app_label in APPS_NA_REPLICA
+            and 'replica' in settings.DATABASES
+            and settings.DB_ROLE != 'ingestao'
+        ):
+            return 'replica'
+        return 'default'
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Primário e réplica contêm os mesmos dados
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == 'default'
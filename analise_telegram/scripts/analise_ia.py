@@ -1,6 +1,7 @@
 import os
 import django
 import re
+import pickle
 from datetime import datetime
 from collections import Counter
 
@@ -8,7 +9,7 @@ from collections import Counter
 import nltk
 from nltk.corpus import stopwords
 from nltk.tokenize import word_tokenize
-from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.feature_extraction.text import TfidfVectorizer, HashingVectorizer
 from sklearn.naive_bayes import MultinomialNB # Um modelo simples para começar
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import classification_report
@@ -19,9 +20,13 @@ from sklearn.metrics import classification_report
 
 # Configurações do Django
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'observatorio_telegram.settings')
+# Processo de ingestão: lê e escreve sempre no banco primário (ver analise_telegram/routers.py)
+os.environ.setdefault('DB_ROLE', 'ingestao')
 django.setup()
 
-from analise_telegram.models import MensagemTelegram
+from django.db.models import OuterRef, Subquery
+
+from analise_telegram.models import MensagemTelegram, RotuloRisco
 
 # --- Configurações e Modelos ---
 
@@ -35,6 +40,26 @@ PALAVRAS_CHAVE_RISCO = [
     'extremista', 'nazismo', 'fascismo', 'racismo', 'genocidio', 'propaganda'
 ]
 
+# Modo do modelo de risco: 'online' (incremental, alimentado pelos rótulos dos analistas)
+# ou 'batch' (treino completo a cada execução, comportamento original)
+MODO_MODELO_RISCO = os.environ.get('MODO_MODELO_RISCO', 'online')
+
+# Arquivo onde o modelo online é persistido entre execuções
+MODELO_RISCO_PATH = os.environ.get(
+    'MODELO_RISCO_PATH',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'modelo_risco_online.pkl')
+)
+
+# Quantidade de rótulos por mini-lote do partial_fit (limita o uso de memória)
+TAMANHO_LOTE_ROTULOS = 256
+
+CLASSES_RISCO = [False, True]
+
+# O HashingVectorizer não guarda vocabulário: o espaço de atributos é fixo, então o
+# modelo pode ser atualizado com textos novos sem refazer a vetorização do histórico.
+# alternate_sign=False mantém os valores não negativos, exigência do MultinomialNB.
+hashing_vectorizer_risco = HashingVectorizer(n_features=2**18, ngram_range=(1, 2), alternate_sign=False)
+
 # --- Funções de Pré-processamento e Análise ---
 
 def preprocess_text(text):
@@ -123,9 +148,103 @@ def train_and_predict_risk_model(texts, labels):
 
     return model, vectorizer
 
+# --- Modelo de Risco Incremental (online) ---
+
+def load_online_risk_model():
+    """
+    Carrega o modelo online salvo em disco, ou None se ainda não existir.
+    """
+    if not os.path.exists(MODELO_RISCO_PATH):
+        return None
+    with open(MODELO_RISCO_PATH, 'rb') as f:
+        return pickle.load(f)
+
+def save_online_risk_model(model):
+    """
+    Salva o modelo de forma atômica (arquivo temporário + os.replace), para que
+    outro processo nunca leia um arquivo pela metade.
+    """
+    tmp_path = f"{MODELO_RISCO_PATH}.tmp"
+    with open(tmp_path, 'wb') as f:
+        pickle.dump(model, f)
+    os.replace(tmp_path, MODELO_RISCO_PATH)
+
+def update_online_risk_model(model, texts, labels):
+    """
+    Atualiza o modelo com um mini-lote via partial_fit, sem retreinar do zero.
+    """
+    if model is None:
+        model = MultinomialNB()
+    X = hashing_vectorizer_risco.transform([" ".join(preprocess_text(text)) for text in texts])
+    model.partial_fit(X, [bool(label) for label in labels], classes=CLASSES_RISCO)
+    return model
+
+def train_online_risk_model_from_labels(model):
+    """
+    Consome os rótulos dos analistas ainda não usados, em mini-lotes de
+    TAMANHO_LOTE_ROTULOS, salvando o modelo após cada lote.
+    """
+    pendentes = RotuloRisco.objects.filter(usado_no_treino=False).select_related('mensagem').order_by('id')
+    total_rotulos = 0
+    while True:
+        lote = list(pendentes[:TAMANHO_LOTE_ROTULOS])
+        if not lote:
+            break
+        model = update_online_risk_model(
+            model,
+            [rotulo.mensagem.texto for rotulo in lote],
+            [rotulo.eh_risco for rotulo in lote],
+        )
+        save_online_risk_model(model)
+        RotuloRisco.objects.filter(id__in=[rotulo.id for rotulo in lote]).update(usado_no_treino=True)
+        total_rotulos += len(lote)
+
+    if total_rotulos:
+        print(f"Modelo de risco online atualizado com {total_rotulos} novos rótulos.")
+    return model
+
+# --- Análise das Mensagens ---
+
+def get_messages_to_analyze(limite=100):
+    """
+    Mensagens ainda não analisadas (sentimento nulo), anotadas com o rótulo de
+    risco mais recente dado por um analista (rotulo_analista), se houver.
+    """
+    ultimo_rotulo = RotuloRisco.objects.filter(mensagem=OuterRef('pk')).order_by('-data_criacao', '-id').values('eh_risco')[:1]
+    return MensagemTelegram.objects.filter(sentimento__isnull=True).annotate(
+        rotulo_analista=Subquery(ultimo_rotulo)
+    )[:limite]
+
+def analyze_message(mensagem, risk_model, vectorizer_risk):
+    """
+    Classifica risco, sentimento e palavras-chave de uma mensagem e a salva.
+    A correção de um analista sempre prevalece sobre a predição do modelo.
+    """
+    # 1. Análise de Risco
+    if getattr(mensagem, 'rotulo_analista', None) is not None:
+        mensagem.eh_risco = mensagem.rotulo_analista
+    # Se o modelo foi treinado com sucesso, use-o
+    elif risk_model and vectorizer_risk:
+        processed_text_for_risk = " ".join(preprocess_text(mensagem.texto))
+        # Transforma o texto para o formato que o modelo espera
+        vectorized_text = vectorizer_risk.transform([processed_text_for_risk])
+        mensagem.eh_risco = bool(risk_model.predict(vectorized_text)[0])
+    else:
+        # Fallback simples para risco se o modelo não puder ser treinado
+        if any(kw in preprocess_text(mensagem.texto) for kw in PALAVRAS_CHAVE_RISCO):
+            mensagem.eh_risco = True
+
+    # 2. Análise de Sentimento (usando a função de simulação)
+    mensagem.sentimento = classify_sentiment(mensagem.texto)
+
+    # 3. Extração de Palavras-Chave (usando a função de lista simples)
+    mensagem.palavras_chave_encontradas = identify_risk_keywords(mensagem.texto) or None # JSONField pode ser None
+
+    mensagem.save()
+
 # --- Função Principal de Análise ---
 
-async def run_analysis():
+def run_analysis():
     print("Iniciando o processo de análise de IA para mensagens do Telegram...")
 
     # --- Passo 1: Carregar um modelo de IA (ou treinar um dummy) ---
@@ -145,13 +264,22 @@ async def run_analysis():
         "risco", "nao_risco", "risco", "nao_risco"
     ]
 
-    risk_model, vectorizer_risk = train_and_predict_risk_model(sample_texts, sample_labels)
+    if MODO_MODELO_RISCO == 'online':
+        risk_model = load_online_risk_model()
+        if risk_model is None:
+            # Partida a frio: inicializa o modelo com os exemplos acima
+            risk_model = update_online_risk_model(None, sample_texts, [label == 'risco' for label in sample_labels])
+            save_online_risk_model(risk_model)
+        risk_model = train_online_risk_model_from_labels(risk_model)
+        vectorizer_risk = hashing_vectorizer_risco
+    else:
+        risk_model, vectorizer_risk = train_and_predict_risk_model(sample_texts, sample_labels)
     # --- Fim do "treinamento" simulado ---
 
 
     # Busca mensagens que ainda não foram analisadas (eh_risco é default False, sentimento é null)
     # Você pode ajustar o filtro para incluir mensagens que precisam de reanálise, etc.
-    mensagens_para_analisar = MensagemTelegram.objects.filter(sentimento__isnull=True)[:100] # Limita para teste
+    mensagens_para_analisar = get_messages_to_analyze(100) # Limita para teste
 
     if not mensagens_para_analisar.exists():
         print("Nenhuma mensagem nova para analisar no momento.")
@@ -161,25 +289,7 @@ async def run_analysis():
 
     for mensagem in mensagens_para_analisar:
         try:
-            # 1. Análise de Risco
-            # Se o modelo foi treinado com sucesso, use-o
-            if risk_model and vectorizer_risk:
-                processed_text_for_risk = " ".join(preprocess_text(mensagem.texto))
-                # Transforma o texto para o formato que o modelo espera
-                vectorized_text = vectorizer_risk.transform([processed_text_for_risk])
-                mensagem.eh_risco = bool(risk_model.predict(vectorized_text)[0])
-            else:
-                # Fallback simples para risco se o modelo não puder ser treinado
-                if any(kw in preprocess_text(mensagem.texto) for kw in PALAVRAS_CHAVE_RISCO):
-                    mensagem.eh_risco = True
-
-            # 2. Análise de Sentimento (usando a função de simulação)
-            mensagem.sentimento = classify_sentiment(mensagem.texto)
-
-            # 3. Extração de Palavras-Chave (usando a função de lista simples)
-            mensagem.palavras_chave_encontradas = identify_risk_keywords(mensagem.texto) or None # JSONField pode ser None
-
-            mensagem.save()
+            analyze_message(mensagem, risk_model, vectorizer_risk)
             # print(f"Mensagem {mensagem.id} analisada: Risco={mensagem.eh_risco}, Sentimento={mensagem.sentimento}")
 
         except Exception as e:
@@ -188,7 +298,6 @@ async def run_analysis():
     print("Processo de análise de IA concluído.")
 
 if __name__ == "__main__":
-    # É preciso rodar o asyncio.run, mesmo que a função principal não seja assíncrona,
-    # caso você introduza chamadas assíncronas no futuro (como um modelo de IA online)
-    import asyncio
-    asyncio.run(run_analysis())
\ No newline at end of file
+    # A análise é síncrona: o ORM do Django (treino com os rótulos e gravação das
+    # mensagens) não pode ser chamado de dentro de um event loop do asyncio
+    run_analysis()
\ No newline at end of file
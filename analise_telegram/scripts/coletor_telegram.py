@@ -3,29 +3,161 @@
 import os
 import django
 import asyncio
+import hashlib
+import heapq
+import shutil
+import sys
 from pyrogram import Client
-from datetime import datetime, timedelta
+from datetime import timedelta
 
 # Configurações do Django
 # Ajuste o caminho para o seu projeto Django
 # Se você estiver executando este script da raiz do projeto, ele deve encontrar o settings.py
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'observatorio_telegram.settings')
+# Processo de ingestão: lê e escreve sempre no banco primário (ver analise_telegram/routers.py)
+os.environ.setdefault('DB_ROLE', 'ingestao')
 django.setup()
 
-from analise_telegram.models import CanalTelegram, MensagemTelegram
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import Count, Q
+from django.utils import timezone
 
-# Suas credenciais da API do Telegram (preencha com as suas!)
-API_ID = 1234567 # Substitua pelo seu api_id
-API_HASH = "sua_api_hash_aqui" # Substitua pelo seu api_hash
+from analise_telegram.models import CanalTelegram, MensagemTelegram, MidiaTelegram
 
-# Nome da sessão do Pyrogram (pode ser qualquer nome, é para armazenar a sessão)
-SESSION_NAME = "observatorio_session"
+# Credenciais da API do Telegram e nome da sessão do Pyrogram, definidos no settings.py
+# (variáveis de ambiente TELEGRAM_API_ID, TELEGRAM_API_HASH e TELEGRAM_SESSION_NAME)
+API_ID = settings.TELEGRAM_API_ID
+API_HASH = settings.TELEGRAM_API_HASH
+SESSION_NAME = settings.TELEGRAM_SESSION_NAME
+
+# Download opcional das mídias para um armazenamento local endereçado por conteúdo (SHA-256)
+BAIXAR_MIDIA = os.environ.get('BAIXAR_MIDIA') == '1'
+MIDIA_DIR = str(settings.MIDIA_DIR)
+MIDIA_WORKERS = 3 # Downloads simultâneos, separados da coleta de texto
+MIDIA_TAMANHO_MAXIMO = 50 * 1024 * 1024 # Arquivos maiores que isso (em bytes) não são baixados
+MIDIA_FILA_MAXIMA = 500 # Downloads aguardando na fila; além disso a mídia fica só com os metadados
+
+# file_unique_id das mídias enfileiradas ou em download nesta execução
+midias_em_andamento = set()
+
+# Agendamento adaptativo (modo daemon: python coletor_telegram.py --daemon)
+JANELA_ESTATISTICAS = timedelta(days=7) # Período usado para calcular taxa de postagem e de risco
+MENSAGENS_POR_COLETA_ALVO = 20 # Consulta o canal quando ~20 mensagens novas são esperadas
+PESO_RISCO = 4.0 # Um canal com 100% de mensagens de risco é consultado até 5x mais cedo
+INTERVALO_MINIMO_COLETA = timedelta(minutes=5)
+INTERVALO_MAXIMO_COLETA = timedelta(hours=24)
+INTERVALO_RECARGA_CANAIS = 300 # Segundos entre as buscas por canais novos ou reativados
 
 # ----- Funções Auxiliares -----
 
-async def get_messages_from_channel(client, canal_db):
+def extract_media(message):
+    """
+    Extrai o tipo de mídia da mensagem e registra seus metadados (file_unique_id,
+    tamanho, mime) em MidiaTelegram, reaproveitando o registro se o arquivo já é conhecido.
+    """
+    if not message.media:
+        return None, None
+
+    media_type = str(message.media).split('.')[-1].lower() # e.g., MessageMediaType.PHOTO -> 'photo'
+    media_obj = getattr(message, media_type, None)
+    file_unique_id = getattr(media_obj, 'file_unique_id', None)
+    if not file_unique_id:
+        # Enquetes, localizações, prévias de links etc. não têm arquivo associado
+        return media_type, None
+
+    midia, _ = MidiaTelegram.objects.get_or_create(
+        file_unique_id=file_unique_id,
+        defaults={
+            'tipo': media_type,
+            'tamanho': getattr(media_obj, 'file_size', None),
+            'mime_type': getattr(media_obj, 'mime_type', None),
+        }
+    )
+    return media_type, midia
+
+def store_content_addressed(tmp_path):
+    """
+    Move um arquivo baixado para MIDIA_DIR/<sha[:2]>/<sha[2:4]>/<sha><ext>.
+    Se o conteúdo já existe no armazenamento, o arquivo temporário é descartado.
+    """
+    sha256 = hashlib.sha256()
+    with open(tmp_path, 'rb') as f:
+        for bloco in iter(lambda: f.read(1024 * 1024), b''):
+            sha256.update(bloco)
+    digest = sha256.hexdigest()
+
+    extensao = os.path.splitext(tmp_path)[1].lower()
+    caminho_relativo = os.path.join(digest[:2], digest[2:4], f"{digest}{extensao}")
+    destino = os.path.join(MIDIA_DIR, caminho_relativo)
+    os.makedirs(os.path.dirname(destino), exist_ok=True)
+    if os.path.exists(destino):
+        os.remove(tmp_path)
+    else:
+        os.replace(tmp_path, destino)
+    return digest, caminho_relativo
+
+def enqueue_media_download(fila_midia, message, midia):
+    """
+    Enfileira o download de uma mídia sem bloquear a coleta de texto. Ignora mídias
+    já baixadas ou já em andamento (o mesmo arquivo encaminhado várias vezes) e,
+    com a fila cheia, descarta o download: os metadados continuam registrados.
+    """
+    if midia.arquivo or midia.file_unique_id in midias_em_andamento:
+        return False
+    try:
+        fila_midia.put_nowait((message, midia))
+    except asyncio.QueueFull:
+        print(f"Fila de mídia cheia: download de {midia.file_unique_id} ignorado.")
+        return False
+    midias_em_andamento.add(midia.file_unique_id)
+    return True
+
+async def download_media_to_store(client, message, midia):
+    """
+    Baixa a mídia de uma mensagem (uma única vez por file_unique_id) para o armazenamento local.
+    """
+    # O ORM não pode ser chamado diretamente no event loop
+    await sync_to_async(midia.refresh_from_db)()
+    if midia.arquivo:
+        return # Já baixada a partir de outra mensagem com o mesmo arquivo
+    if midia.tamanho and midia.tamanho > MIDIA_TAMANHO_MAXIMO:
+        print(f"Mídia {midia.file_unique_id} ignorada: {midia.tamanho} bytes excede o limite.")
+        return
+
+    # Diretório temporário exclusivo por arquivo: enqueue_media_download garante um único download por file_unique_id
+    tmp_dir = os.path.join(MIDIA_DIR, 'tmp', midia.file_unique_id)
+    try:
+        tmp_path = await client.download_media(message, file_name=tmp_dir + os.sep)
+        if not tmp_path:
+            return
+        # Hash e cópia são bloqueantes: rodam em uma thread para não travar o event loop
+        midia.sha256, midia.arquivo = await asyncio.to_thread(store_content_addressed, tmp_path)
+        midia.data_download = timezone.now()
+        await sync_to_async(midia.save)()
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+async def media_download_worker(client, fila_midia):
+    """
+    Consome a fila de mídias pendentes. Vários workers rodam em paralelo à coleta
+    de texto, que apenas enfileira as mídias e segue adiante.
+    """
+    while True:
+        message, midia = await fila_midia.get()
+        try:
+            await download_media_to_store(client, message, midia)
+        except Exception as e:
+            print(f"Erro ao baixar mídia {midia.file_unique_id}: {e}")
+        finally:
+            midias_em_andamento.discard(midia.file_unique_id)
+            fila_midia.task_done()
+
+async def get_messages_from_channel(client, canal_db, fila_midia=None):
     """
     Busca mensagens de um canal e as salva no banco de dados Django.
+    Se fila_midia for informada, as mídias ainda não baixadas são enfileiradas para os workers de download.
     """
     print(f"Buscando mensagens do canal: {canal_db.nome} ({canal_db.username or canal_db.telegram_id})")
     
@@ -34,7 +166,7 @@ async def get_messages_from_channel(client, canal_db):
     offset_date = canal_db.ultimo_processamento
     if not offset_date:
         # Pega mensagens dos últimos 30 dias se for o primeiro processamento
-        offset_date = datetime.now() - timedelta(days=30) 
+        offset_date = timezone.now() - timedelta(days=30) 
         
     messages_count = 0
     try:
@@ -46,29 +178,31 @@ async def get_messages_from_channel(client, canal_db):
             if message.date and message.date.replace(tzinfo=None) <= offset_date.replace(tzinfo=None):
                 break # Já processamos até aqui, para a iteração
             
-            # Garante que a mensagem tem texto e que não é uma mensagem de serviço
-            if message.text:
+            # Garante que a mensagem tem texto ou mídia e que não é uma mensagem de serviço
+            if message.text or message.media:
                 # print(f"  > Nova mensagem de {canal_db.nome} em {message.date}: {message.text[:50]}...")
-                
-                # Obtém o tipo de mídia
-                media_type = None
-                if message.media:
-                    media_type = str(message.media).split('.')[-1].lower() # e.g., MessageMediaType.PHOTO -> 'photo'
 
                 try:
+                    # Obtém o tipo e os metadados da mídia
+                    media_type, midia = await sync_to_async(extract_media)(message)
+
                     # Cria ou atualiza a mensagem no banco de dados
                     # Usamos update_or_create para evitar duplicatas se o script rodar novamente com mensagens recentes
-                    MensagemTelegram.objects.update_or_create(
+                    await sync_to_async(MensagemTelegram.objects.update_or_create)(
                         canal=canal_db,
                         mensagem_id=message.id,
                         defaults={
-                            'texto': message.text,
+                            'texto': message.text or message.caption, # Fotos e vídeos trazem o texto na legenda
                             'data_publicacao': message.date,
                             'tipo_midia': media_type,
+                            'midia': midia,
                             # eh_risco, sentimento, palavras_chave_encontradas serão preenchidos pela análise de IA
                         }
                     )
                     messages_count += 1
+
+                    if fila_midia is not None and midia:
+                        enqueue_media_download(fila_midia, message, midia)
                 except Exception as e:
                     print(f"Erro ao salvar mensagem {message.id} do canal {canal_db.nome}: {e}")
             
@@ -76,17 +210,109 @@ async def get_messages_from_channel(client, canal_db):
             await asyncio.sleep(0.1) # Pequeno delay entre as requisições para ser educado com a API
 
         # Atualiza o timestamp do último processamento
-        canal_db.ultimo_processamento = datetime.now()
-        canal_db.save()
+        canal_db.ultimo_processamento = timezone.now()
+        await sync_to_async(canal_db.save)()
         print(f"Coletadas {messages_count} novas mensagens do canal {canal_db.nome}.")
 
     except Exception as e:
         print(f"Erro ao coletar do canal {canal_db.nome}: {e}")
 
+# ----- Agendamento Adaptativo -----
+
+def update_channel_schedule(canal_db):
+    """
+    Recalcula as taxas de postagem e de risco do canal a partir das mensagens da
+    janela recente e define a próxima coleta: canais movimentados e de maior risco
+    são consultados mais cedo, canais parados mais tarde.
+    """
+    agora = timezone.now()
+    agregado = canal_db.mensagens.filter(data_publicacao__gte=agora - JANELA_ESTATISTICAS).aggregate(
+        total=Count('id'),
+        riscos=Count('id', filter=Q(eh_risco=True)),
+    )
+    horas_janela = JANELA_ESTATISTICAS.total_seconds() / 3600
+    canal_db.taxa_postagem = agregado['total'] / horas_janela
+    canal_db.taxa_risco = agregado['riscos'] / agregado['total'] if agregado['total'] else 0
+
+    if canal_db.taxa_postagem > 0:
+        intervalo = timedelta(hours=MENSAGENS_POR_COLETA_ALVO / canal_db.taxa_postagem)
+    else:
+        intervalo = INTERVALO_MAXIMO_COLETA
+    intervalo = intervalo / (1 + PESO_RISCO * canal_db.taxa_risco)
+    intervalo = max(INTERVALO_MINIMO_COLETA, min(intervalo, INTERVALO_MAXIMO_COLETA))
+
+    canal_db.proxima_coleta = agora + intervalo
+    # Estatísticas do agendador não aparecem nas páginas: atualizado_em (versão do cache) fica de fora
+    canal_db.save(update_fields=['taxa_postagem', 'taxa_risco', 'proxima_coleta'])
+
+async def collect_channel(client, canal_db, fila_midia=None):
+    """
+    Coleta um canal e reagenda sua próxima consulta.
+    """
+    await get_messages_from_channel(client, canal_db, fila_midia)
+    await sync_to_async(update_channel_schedule)(canal_db)
+
+def load_channels_to_schedule(agendados):
+    """
+    Canais ativos que ainda não estão no heap do agendador.
+    """
+    # Fora do ciclo de requisições o Django não descarta conexões expiradas
+    # (CONN_MAX_AGE) nem as derrubadas pelo servidor (wait_timeout do MySQL)
+    close_old_connections()
+    return list(CanalTelegram.objects.filter(ativo=True).exclude(id__in=agendados))
+
+def get_due_channel(canal_id):
+    """
+    Recarrega o canal vencido, ou None se ele foi desativado ou removido.
+    """
+    close_old_connections()
+    return CanalTelegram.objects.filter(id=canal_id, ativo=True).first()
+
+async def run_scheduler(client, fila_midia=None):
+    """
+    Daemon de coleta: mantém um heap de canais ordenado pela próxima coleta
+    (empates favorecem o canal de maior risco) e consulta cada canal só quando vence.
+    """
+    heap_canais = [] # (timestamp da próxima coleta, -taxa_risco, id do canal)
+    agendados = set()
+    proxima_recarga = 0
+
+    while True:
+        agora = timezone.now().timestamp()
+
+        # Inclui canais novos ou reativados desde a última busca
+        if agora >= proxima_recarga:
+            # O ORM roda fora do event loop (sync_to_async), como exige o Django
+            for canal_db in await sync_to_async(load_channels_to_schedule)(agendados):
+                vencimento = canal_db.proxima_coleta.timestamp() if canal_db.proxima_coleta else agora
+                heapq.heappush(heap_canais, (vencimento, -canal_db.taxa_risco, canal_db.id))
+                agendados.add(canal_db.id)
+            proxima_recarga = agora + INTERVALO_RECARGA_CANAIS
+
+        if not heap_canais or heap_canais[0][0] > agora:
+            # Dorme até o próximo canal vencer (ou até a próxima recarga da lista)
+            proximo_vencimento = heap_canais[0][0] if heap_canais else proxima_recarga
+            await asyncio.sleep(max(0, min(proximo_vencimento, proxima_recarga) - agora))
+            continue
+
+        _, _, canal_id = heapq.heappop(heap_canais)
+        canal_db = await sync_to_async(get_due_channel)(canal_id)
+        if canal_db is None:
+            # Canal desativado ou removido: sai do agendamento até ser reativado
+            agendados.discard(canal_id)
+            continue
+
+        await collect_channel(client, canal_db, fila_midia)
+        heapq.heappush(heap_canais, (canal_db.proxima_coleta.timestamp(), -canal_db.taxa_risco, canal_db.id))
+        await asyncio.sleep(1) # Pequeno intervalo entre canais vencidos ao mesmo tempo
+
 async def main():
     """
     Função principal que gerencia a conexão e a coleta dos canais.
+    Com --daemon, roda continuamente com o agendamento adaptativo.
     """
+    modo_daemon = '--daemon' in sys.argv
+
     # Inicializa o cliente Pyrogram
     app = Client(SESSION_NAME, api_id=API_ID, api_hash=API_HASH)
     
@@ -96,18 +322,36 @@ async def main():
         print(f"Conectado ao Telegram como: {me.first_name} (@{me.username or 'Sem username'})")
 
         # Busca todos os canais ativos no seu banco de dados Django
-        canais_ativos = CanalTelegram.objects.filter(ativo=True)
+        canais_ativos = await sync_to_async(list)(CanalTelegram.objects.filter(ativo=True))
 
-        if not canais_ativos.exists():
+        if not canais_ativos and not modo_daemon:
             print("Nenhum canal ativo encontrado no banco de dados. Adicione canais via Admin do Django.")
+            print("Para importar muitos canais de uma vez: python manage.py importar_canais canais.txt")
             print("Exemplo: python manage.py shell")
             print("from analise_telegram.models import CanalTelegram")
             print("CanalTelegram.objects.create(nome='SeuCanalPublico', username='SeuCanalPublico', telegram_id=1234567890)")
             return
 
+        # Pool de workers de download de mídia, independente da coleta de texto
+        fila_midia = None
+        workers_midia = []
+        if BAIXAR_MIDIA:
+            fila_midia = asyncio.Queue(maxsize=MIDIA_FILA_MAXIMA)
+            workers_midia = [asyncio.create_task(media_download_worker(app, fila_midia)) for _ in range(MIDIA_WORKERS)]
+
+        if modo_daemon:
+            await run_scheduler(app, fila_midia)
+            return
+
         for canal_db in canais_ativos:
-            await get_messages_from_channel(app, canal_db)
+            await collect_channel(app, canal_db, fila_midia)
             await asyncio.sleep(5) # Delay entre a coleta de cada canal para evitar sobrecarga
 
+        if fila_midia is not None:
+            # Aguarda os downloads pendentes antes de encerrar a sessão do Telegram
+            await fila_midia.join()
+            for worker in workers_midia:
+                worker.cancel()
+
 if __name__ == "__main__":
     asyncio.run(main())
\ No newline at end of file
@@ -0,0 +1,16 @@
+# analise_telegram/signals.py
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import CanalTelegram, MensagemTelegram
+
+
+@receiver(post_delete, sender=MensagemTelegram)
+def invalidar_cache_ao_remover_mensagem(sender, instance, **kwargs):
+    """
+    O carimbo da tabela de mensagens (MAX de id e atualizado_em) não percebe a remoção
+    de uma mensagem antiga. A remoção avança o carimbo de cadastro do canal, que também
+    compõe o ETag da lista de mensagens, sem exigir uma contagem da tabela inteira.
+    """
+    CanalTelegram.objects.filter(pk=instance.canal_id).update(cadastro_alterado_em=timezone.now())
@@ -1,3 +1,618 @@
-from django.test import TestCase
+import asyncio
+import hashlib
+import os
+import tempfile
+from collections import Counter
+from io import StringIO
+from datetime import timedelta
+from types import SimpleNamespace
+from unittest import mock
 
-# Create your tests here.
+import nltk.corpus
+from asgiref.sync import async_to_sync
+
+from django.conf import settings
+from django.core.management import call_command
+from django.contrib.admin.models import LogEntry
+from django.contrib.auth.models import User
+from django.contrib.contenttypes.models import ContentType
+from django.contrib.sessions.models import Session
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from pyrogram.errors import FloodWait, UsernameNotOccupied
+
+from .management.commands import importar_canais
+from .management.commands.importar_canais import Command as ImportarCanaisCommand
+from .management.commands.importar_canais import TTL_CACHE_NEGATIVO, normalizar_chave, resolucao_valida
+from .models import CanalTelegram, MensagemTelegram, MidiaTelegram, ResolucaoCanal, RotuloRisco
+from .routers import PrimaryReplicaRouter
+from .scripts import coletor_telegram
+
+# O script de análise carrega as stopwords do NLTK ao ser importado; os testes usam
+# uma lista fixa para não depender do download dos corpora (nltk.download)
+STOPWORDS_TESTE = ['de', 'a', 'o', 'que', 'e', 'do', 'da', 'em', 'um', 'no', 'na']
+with mock.patch.object(nltk.corpus, 'stopwords', SimpleNamespace(words=lambda idioma: STOPWORDS_TESTE)):
+    from .scripts import analise_ia
+
+
+class PrimaryReplicaRouterTests(SimpleTestCase):
+    """
+    Decisão de roteamento por papel do processo (web/ingestao) e por app.
+    """
+
+    def setUp(self):
+        self.router = PrimaryReplicaRouter()
+
+    def _com_replica(self):
+        return mock.patch.dict(settings.DATABASES, {'replica': settings.DATABASES['default']})
+
+    def test_web_le_modelos_do_observatorio_da_replica(self):
+        with self._com_replica(), override_settings(DB_ROLE='web'):
+            for model in (CanalTelegram, MensagemTelegram):
+                self.assertEqual(self.router.db_for_read(model), 'replica')
+
+    def test_web_le_apps_do_django_do_primario(self):
+        with self._com_replica(), override_settings(DB_ROLE='web'):
+            for model in (Session, User, ContentType, LogEntry):
+                self.assertEqual(self.router.db_for_read(model), 'default')
+
+    def test_ingestao_le_tudo_do_primario(self):
+        with self._com_replica(), override_settings(DB_ROLE='ingestao'):
+            for model in (CanalTelegram, MensagemTelegram, Session, User):
+                self.assertEqual(self.router.db_for_read(model), 'default')
+
+    def test_sem_replica_le_do_primario(self):
+        with override_settings(DB_ROLE='web'):
+            self.assertNotIn('replica', settings.DATABASES)
+            self.assertEqual(self.router.db_for_read(CanalTelegram), 'default')
+
+    def test_escritas_e_migracoes_sempre_no_primario(self):
+        with self._com_replica():
+            for role in ('web', 'ingestao'):
+                with override_settings(DB_ROLE=role):
+                    for model in (CanalTelegram, Session, User):
+                        self.assertEqual(self.router.db_for_write(model), 'default')
+            self.assertTrue(self.router.allow_migrate('default', 'analise_telegram'))
+            self.assertFalse(self.router.allow_migrate('replica', 'analise_telegram'))
+
+
+class ListasCacheTests(TestCase):
+    """
+    ETag/GET condicional, compressão gzip e versões de cache das listas.
+    """
+
+    def setUp(self):
+        self.canal = CanalTelegram.objects.create(nome='Canal A', username='canal_a', telegram_id=1001)
+        MensagemTelegram.objects.create(canal=self.canal, mensagem_id=1, texto='Primeira mensagem', data_publicacao=timezone.now())
+
+    def _etag(self, url_name):
+        response = self.client.get(reverse(url_name))
+        self.assertEqual(response.status_code, 200)
+        return response['ETag']
+
+    def test_get_condicional_responde_304(self):
+        for url_name in ('lista_canais', 'lista_mensagens'):
+            etag = self._etag(url_name)
+            response = self.client.get(reverse(url_name), HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 304)
+
+    def test_resposta_comprimida_com_gzip(self):
+        for url_name in ('lista_canais', 'lista_mensagens'):
+            response = self.client.get(reverse(url_name), HTTP_ACCEPT_ENCODING='gzip')
+            self.assertEqual(response['Content-Encoding'], 'gzip')
+            self.assertIn('Accept-Encoding', response['Vary'])
+
+    def test_coleta_nao_invalida_lista_de_mensagens(self):
+        etag_mensagens = self._etag('lista_mensagens')
+        etag_canais = self._etag('lista_canais')
+
+        # Simula o coletor: só o último processamento e as estatísticas mudam
+        self.canal.ultimo_processamento = timezone.now()
+        self.canal.save()
+        self.canal.taxa_postagem = 2.0
+        self.canal.save(update_fields=['taxa_postagem'])
+
+        self.assertEqual(self._etag('lista_mensagens'), etag_mensagens)
+        # A lista de canais exibe o último processamento, então muda
+        self.assertNotEqual(self._etag('lista_canais'), etag_canais)
+
+    def test_renomear_canal_invalida_lista_de_mensagens(self):
+        etag = self._etag('lista_mensagens')
+        self.canal.nome = 'Canal A renomeado'
+        self.canal.save()
+        self.assertNotEqual(self._etag('lista_mensagens'), etag)
+        self.assertContains(self.client.get(reverse('lista_mensagens')), 'Canal A renomeado')
+
+    def test_nova_mensagem_invalida_lista_de_mensagens(self):
+        etag = self._etag('lista_mensagens')
+        MensagemTelegram.objects.create(canal=self.canal, mensagem_id=2, texto='Segunda', data_publicacao=timezone.now())
+        self.assertNotEqual(self._etag('lista_mensagens'), etag)
+
+    def test_remover_mensagem_antiga_invalida_lista_de_mensagens(self):
+        MensagemTelegram.objects.create(canal=self.canal, mensagem_id=2, texto='Mais recente', data_publicacao=timezone.now())
+        etag = self._etag('lista_mensagens')
+
+        # Remove a mensagem mais antiga: MAX(id) e MAX(atualizado_em) não mudam
+        MensagemTelegram.objects.filter(mensagem_id=1).delete()
+
+        response = self.client.get(reverse('lista_mensagens'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotContains(response, 'Primeira mensagem')
+
+
+class RotuloRiscoAdminTests(TestCase):
+    """
+    Ações de correção do admin de mensagens.
+    """
+
+    def setUp(self):
+        self.analista = User.objects.create_superuser('analista', 'analista@example.com', 'senha')
+        self.client.force_login(self.analista)
+        canal = CanalTelegram.objects.create(nome='Canal A', telegram_id=1001)
+        self.mensagem = MensagemTelegram.objects.create(canal=canal, mensagem_id=1, texto='Texto', data_publicacao=timezone.now())
+
+    def test_marcar_como_risco_cria_rotulo_e_atualiza_mensagem(self):
+        atualizado_em = self.mensagem.atualizado_em
+        response = self.client.post(
+            reverse('admin:analise_telegram_mensagemtelegram_changelist'),
+            {'action': 'marcar_como_risco', '_selected_action': [self.mensagem.pk]},
+        )
+        self.assertEqual(response.status_code, 302)
+
+        rotulo = RotuloRisco.objects.get()
+        self.assertEqual(rotulo.mensagem, self.mensagem)
+        self.assertTrue(rotulo.eh_risco)
+        self.assertEqual(rotulo.analista, self.analista)
+        self.assertFalse(rotulo.usado_no_treino)
+
+        self.mensagem.refresh_from_db()
+        self.assertTrue(self.mensagem.eh_risco)
+        self.assertGreater(self.mensagem.atualizado_em, atualizado_em)
+
+
+class ModeloRiscoOnlineTests(TestCase):
+    """
+    Treinamento incremental do modelo de risco (scripts/analise_ia.py).
+    """
+
+    def setUp(self):
+        self.canal = CanalTelegram.objects.create(nome='Canal A', telegram_id=1001)
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        for patcher in (
+            mock.patch.object(analise_ia, 'MODELO_RISCO_PATH', os.path.join(tmp_dir.name, 'modelo.pkl')),
+            # Tokenizador simples no lugar do punkt do NLTK (que exige download)
+            mock.patch.object(analise_ia, 'word_tokenize', lambda texto, language=None: texto.split()),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _mensagem(self, mensagem_id, texto):
+        return MensagemTelegram.objects.create(canal=self.canal, mensagem_id=mensagem_id, texto=texto, data_publicacao=timezone.now())
+
+    def test_partial_fit_acumula_dois_lotes(self):
+        modelo = analise_ia.update_online_risk_model(None, ['ataque terrorista armado', 'passeio no parque'], [True, False])
+        self.assertEqual(modelo.class_count_.sum(), 2)
+
+        modelo_atualizado = analise_ia.update_online_risk_model(modelo, ['ameaça de violência extremista'], [True])
+        self.assertIs(modelo_atualizado, modelo)
+        self.assertEqual(list(modelo.classes_), [False, True])
+        self.assertEqual(list(modelo.class_count_), [1, 2])
+
+    def test_rotulos_sao_consumidos_em_mini_lotes(self):
+        for i, (texto, eh_risco) in enumerate([('ataque armado', True), ('bom dia', False), ('ameaça terror', True)]):
+            RotuloRisco.objects.create(mensagem=self._mensagem(i, texto), eh_risco=eh_risco)
+
+        with mock.patch.object(analise_ia, 'TAMANHO_LOTE_ROTULOS', 2):
+            modelo = analise_ia.train_online_risk_model_from_labels(None)
+
+        self.assertFalse(RotuloRisco.objects.filter(usado_no_treino=False).exists())
+        self.assertEqual(modelo.class_count_.sum(), 3)
+        self.assertTrue(os.path.exists(analise_ia.MODELO_RISCO_PATH))
+
+        # Sem rótulos pendentes, o modelo não é alterado
+        self.assertEqual(analise_ia.train_online_risk_model_from_labels(modelo).class_count_.sum(), 3)
+
+    def test_rotulo_do_analista_prevalece_sobre_o_modelo(self):
+        mensagem = self._mensagem(1, 'ataque terrorista')
+        RotuloRisco.objects.create(mensagem=mensagem, eh_risco=True)
+        RotuloRisco.objects.create(mensagem=mensagem, eh_risco=False) # Correção mais recente
+
+        class ModeloSempreRisco:
+            def predict(self, X): return [True] * X.shape[0]
+
+        for mensagem_analise in analise_ia.get_messages_to_analyze():
+            analise_ia.analyze_message(mensagem_analise, ModeloSempreRisco(), analise_ia.hashing_vectorizer_risco)
+
+        mensagem.refresh_from_db()
+        self.assertFalse(mensagem.eh_risco)
+        self.assertIsNotNone(mensagem.sentimento)
+
+
+    def test_run_analysis_treina_com_rotulos_e_analisa_mensagens(self):
+        rotulada = self._mensagem(1, 'ataque terrorista armado')
+        RotuloRisco.objects.create(mensagem=rotulada, eh_risco=False)
+        nova = self._mensagem(2, 'passeio bom no parque')
+
+        with mock.patch.object(analise_ia, 'MODO_MODELO_RISCO', 'online'), mock.patch('builtins.print'):
+            analise_ia.run_analysis()
+
+        self.assertFalse(RotuloRisco.objects.filter(usado_no_treino=False).exists())
+        self.assertTrue(os.path.exists(analise_ia.MODELO_RISCO_PATH))
+        # 8 exemplos da partida a frio + 1 rótulo do analista
+        self.assertEqual(analise_ia.load_online_risk_model().class_count_.sum(), 9)
+
+        rotulada.refresh_from_db()
+        nova.refresh_from_db()
+        self.assertFalse(rotulada.eh_risco)
+        self.assertEqual(rotulada.palavras_chave_encontradas, ['ataque'])
+        self.assertEqual(nova.sentimento, 'positivo')
+
+class ArmazenamentoMidiaTests(SimpleTestCase):
+    """
+    Armazenamento endereçado por conteúdo e fila de downloads do coletor.
+    """
+
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.midia_dir = tmp_dir.name
+        for patcher in (
+            mock.patch.object(coletor_telegram, 'MIDIA_DIR', self.midia_dir),
+            mock.patch.object(coletor_telegram, 'midias_em_andamento', set()),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _arquivo_temporario(self, nome, conteudo):
+        caminho = os.path.join(self.midia_dir, 'tmp', nome)
+        os.makedirs(os.path.dirname(caminho), exist_ok=True)
+        with open(caminho, 'wb') as f:
+            f.write(conteudo)
+        return caminho
+
+    def test_layout_do_caminho(self):
+        digest = hashlib.sha256(b'foto').hexdigest()
+        tmp_path = self._arquivo_temporario('a/photo.JPG', b'foto')
+
+        sha256, caminho_relativo = coletor_telegram.store_content_addressed(tmp_path)
+
+        self.assertEqual(sha256, digest)
+        self.assertEqual(caminho_relativo, os.path.join(digest[:2], digest[2:4], f"{digest}.jpg"))
+        self.assertTrue(os.path.isfile(os.path.join(self.midia_dir, caminho_relativo)))
+        self.assertFalse(os.path.exists(tmp_path))
+
+    def test_conteudo_identico_vira_um_unico_arquivo(self):
+        primeiro = coletor_telegram.store_content_addressed(self._arquivo_temporario('a/video.mp4', b'mesmo video'))
+        segundo_tmp = self._arquivo_temporario('b/video.mp4', b'mesmo video')
+        segundo = coletor_telegram.store_content_addressed(segundo_tmp)
+        diferente = coletor_telegram.store_content_addressed(self._arquivo_temporario('c/video.mp4', b'outro video'))
+
+        self.assertEqual(primeiro, segundo)
+        self.assertNotEqual(primeiro, diferente)
+        self.assertFalse(os.path.exists(segundo_tmp))
+        arquivos = [nome for _, _, nomes in os.walk(self.midia_dir) for nome in nomes]
+        self.assertEqual(len(arquivos), 2)
+
+    def test_fila_ignora_midia_ja_enfileirada_baixada_ou_com_fila_cheia(self):
+        fila = asyncio.Queue(maxsize=2)
+        midia = MidiaTelegram(file_unique_id='AgADAQ', tipo='photo')
+
+        self.assertTrue(coletor_telegram.enqueue_media_download(fila, 'mensagem 1', midia))
+        # Mesmo arquivo encaminhado em outra mensagem: não é baixado de novo
+        self.assertFalse(coletor_telegram.enqueue_media_download(fila, 'mensagem 2', MidiaTelegram(file_unique_id='AgADAQ', tipo='photo')))
+        self.assertFalse(coletor_telegram.enqueue_media_download(fila, 'mensagem 3', MidiaTelegram(file_unique_id='AgADAg', tipo='photo', arquivo='ab/cd/x.jpg')))
+        self.assertTrue(coletor_telegram.enqueue_media_download(fila, 'mensagem 4', MidiaTelegram(file_unique_id='AgADAw', tipo='video')))
+        # Fila cheia: o download é descartado sem bloquear a coleta
+        self.assertFalse(coletor_telegram.enqueue_media_download(fila, 'mensagem 5', MidiaTelegram(file_unique_id='AgADBA', tipo='video')))
+
+        self.assertEqual(fila.qsize(), 2)
+        self.assertEqual(coletor_telegram.midias_em_andamento, {'AgADAQ', 'AgADAw'})
+
+
+class AgendamentoCanalTests(TestCase):
+    """
+    Cálculo da próxima coleta pelo agendador adaptativo (update_channel_schedule).
+    """
+
+    def setUp(self):
+        self.canal = CanalTelegram.objects.create(nome='Canal A', telegram_id=1001)
+
+    def _criar_mensagens(self, total, riscos=0):
+        # Uma mensagem por hora dentro da janela de 7 dias
+        agora = timezone.now()
+        MensagemTelegram.objects.bulk_create([
+            MensagemTelegram(canal=self.canal, mensagem_id=i, texto='texto', data_publicacao=agora - timedelta(hours=i), eh_risco=i < riscos)
+            for i in range(total)
+        ])
+
+    def _intervalo(self):
+        inicio = timezone.now()
+        coletor_telegram.update_channel_schedule(self.canal)
+        self.canal.refresh_from_db()
+        return self.canal.proxima_coleta - inicio
+
+    def assertIntervalo(self, intervalo, esperado):
+        self.assertAlmostEqual(intervalo.total_seconds(), esperado.total_seconds(), delta=5)
+
+    def test_taxa_de_postagem_define_o_intervalo(self):
+        self._criar_mensagens(168) # 1 mensagem/hora
+        intervalo = self._intervalo()
+        self.assertAlmostEqual(self.canal.taxa_postagem, 1.0)
+        self.assertEqual(self.canal.taxa_risco, 0)
+        self.assertIntervalo(intervalo, timedelta(hours=coletor_telegram.MENSAGENS_POR_COLETA_ALVO))
+
+    def test_risco_antecipa_a_coleta(self):
+        self._criar_mensagens(168, riscos=84) # 50% de risco
+        intervalo = self._intervalo()
+        self.assertAlmostEqual(self.canal.taxa_risco, 0.5)
+        esperado = timedelta(hours=coletor_telegram.MENSAGENS_POR_COLETA_ALVO) / (1 + coletor_telegram.PESO_RISCO * 0.5)
+        self.assertIntervalo(intervalo, esperado)
+
+    def test_canal_sem_mensagens_usa_intervalo_maximo(self):
+        MensagemTelegram.objects.create(canal=self.canal, mensagem_id=1, data_publicacao=timezone.now() - timedelta(days=30))
+        intervalo = self._intervalo()
+        self.assertEqual(self.canal.taxa_postagem, 0)
+        self.assertIntervalo(intervalo, coletor_telegram.INTERVALO_MAXIMO_COLETA)
+
+    def test_intervalo_limitado_entre_minimo_e_maximo(self):
+        self._criar_mensagens(168, riscos=168)
+        with mock.patch.object(coletor_telegram, 'MENSAGENS_POR_COLETA_ALVO', 0.1):
+            self.assertIntervalo(self._intervalo(), coletor_telegram.INTERVALO_MINIMO_COLETA)
+
+        MensagemTelegram.objects.all().delete()
+        self._criar_mensagens(1) # 1 mensagem por semana: 20 mensagens levariam meses
+        self.assertIntervalo(self._intervalo(), coletor_telegram.INTERVALO_MAXIMO_COLETA)
+
+
+
+
+class PararDaemon(Exception):
+    pass
+
+
+class ClienteHistoricoFalso:
+    """
+    Substitui o Client do Pyrogram: devolve uma mensagem nova por canal consultado.
+    """
+
+    def __init__(self):
+        self.canais_consultados = []
+
+    async def get_chat_history(self, chat_id, limit):
+        self.canais_consultados.append(chat_id)
+        yield SimpleNamespace(id=1, date=timezone.now(), text=f"mensagem do canal {chat_id}", caption=None, media=None)
+
+
+class RunSchedulerTests(TestCase):
+    """
+    Daemon de coleta (run_scheduler) rodando no event loop.
+    """
+
+    def test_daemon_coleta_canais_vencidos_e_reagenda(self):
+        CanalTelegram.objects.create(nome='Canal A', telegram_id=1001)
+        CanalTelegram.objects.create(nome='Canal B', telegram_id=1002)
+        CanalTelegram.objects.create(nome='Canal Inativo', telegram_id=1003, ativo=False)
+        cliente = ClienteHistoricoFalso()
+
+        async def sleep_falso(segundos):
+            # Pausas curtas (entre mensagens/canais) passam direto; a espera
+            # pelo próximo vencimento encerra o daemon
+            if segundos > 1:
+                raise PararDaemon
+
+        # close_old_connections fecharia a conexão da transação do TestCase
+        with mock.patch.object(coletor_telegram, 'close_old_connections') as close_old_connections, \
+                mock.patch.object(coletor_telegram.asyncio, 'sleep', sleep_falso), mock.patch('builtins.print'):
+            with self.assertRaises(PararDaemon):
+                async_to_sync(coletor_telegram.run_scheduler)(cliente)
+
+        self.assertCountEqual(cliente.canais_consultados, [1001, 1002])
+        self.assertGreaterEqual(close_old_connections.call_count, 3) # Recarga + um por canal vencido
+        for canal in CanalTelegram.objects.filter(ativo=True):
+            self.assertEqual(canal.mensagens.count(), 1)
+            self.assertIsNotNone(canal.ultimo_processamento)
+            self.assertGreater(canal.proxima_coleta, timezone.now())
+            self.assertGreater(canal.taxa_postagem, 0)
+        self.assertFalse(MensagemTelegram.objects.filter(canal__telegram_id=1003).exists())
+
+class ClienteMidiaFalso:
+    """
+    Substitui o Client do Pyrogram: grava o conteúdo da "mensagem" no diretório pedido.
+    """
+
+    def __init__(self):
+        self.downloads = 0
+
+    async def download_media(self, message, file_name):
+        self.downloads += 1
+        os.makedirs(file_name, exist_ok=True)
+        caminho = os.path.join(file_name, 'photo.jpg')
+        with open(caminho, 'wb') as f:
+            f.write(message.conteudo)
+        return caminho
+
+
+class MidiaWorkerTests(TestCase):
+    """
+    Worker de download de mídia rodando no event loop (media_download_worker).
+    """
+
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.midia_dir = tmp_dir.name
+        for patcher in (
+            mock.patch.object(coletor_telegram, 'MIDIA_DIR', self.midia_dir),
+            mock.patch.object(coletor_telegram, 'midias_em_andamento', set()),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    async def _processar_fila(self, cliente, itens):
+        fila = asyncio.Queue()
+        for item in itens:
+            fila.put_nowait(item)
+        worker = asyncio.create_task(coletor_telegram.media_download_worker(cliente, fila))
+        await fila.join()
+        worker.cancel()
+
+    def test_worker_baixa_e_registra_midias(self):
+        foto = MidiaTelegram.objects.create(file_unique_id='AgADAQ', tipo='photo')
+        copia = MidiaTelegram.objects.create(file_unique_id='AgADAg', tipo='photo') # Mesmo conteúdo, outro arquivo
+        baixada = MidiaTelegram.objects.create(file_unique_id='AgADAw', tipo='photo', arquivo='ab/cd/x.jpg')
+        cliente = ClienteMidiaFalso()
+        mensagem = SimpleNamespace(conteudo=b'foto')
+
+        async_to_sync(self._processar_fila)(cliente, [(mensagem, foto), (mensagem, copia), (mensagem, baixada)])
+
+        # A mídia já baixada não é buscada de novo
+        self.assertEqual(cliente.downloads, 2)
+        digest = hashlib.sha256(b'foto').hexdigest()
+        for midia in (foto, copia):
+            midia.refresh_from_db()
+            self.assertEqual(midia.sha256, digest)
+            self.assertEqual(midia.arquivo, os.path.join(digest[:2], digest[2:4], f"{digest}.jpg"))
+            self.assertTrue(timezone.is_aware(midia.data_download))
+        self.assertTrue(os.path.isfile(os.path.join(self.midia_dir, foto.arquivo)))
+        self.assertEqual(os.listdir(os.path.join(self.midia_dir, 'tmp')), [])
+
+class NormalizarChaveTests(SimpleTestCase):
+    """
+    Normalização das entradas do comando importar_canais.
+    """
+
+    def test_formas_de_username(self):
+        for entrada in ('@Canal_Teste', 'canal_teste', 't.me/Canal_Teste', 'https://t.me/canal_teste/123',
+                        'https://telegram.me/canal_teste?start=1', 'https://t.me/s/Canal_Teste', 't.me/s/canal_teste/42'):
+            self.assertEqual(normalizar_chave(entrada), 'canal_teste', entrada)
+
+    def test_links_de_convite_preservam_o_hash(self):
+        self.assertEqual(normalizar_chave('t.me/+AbCdEf'), 'https://t.me/+AbCdEf')
+        self.assertEqual(normalizar_chave('https://t.me/joinchat/AAAbbb'), 'https://t.me/joinchat/AAAbbb')
+
+    def test_entradas_invalidas(self):
+        for entrada in ('12345', '@1canal', 'abc', 'https://t.me/addlist/xyz', 'https://t.me/addstickers/pack',
+                        'https://t.me/c/123456/7', 't.me/share/url?url=x', 'https://example.com/canal', 't.me/s'):
+            self.assertIsNone(normalizar_chave(entrada), entrada)
+
+
+class ImportarCanaisTests(TestCase):
+    """
+    Cache de resolução e registro de canais do comando importar_canais.
+    """
+
+    def test_cache_negativo_expira(self):
+        agora = timezone.now()
+        sucesso = ResolucaoCanal(chave='canal', telegram_id=-1001, data_resolucao=agora - timedelta(days=365))
+        falha_recente = ResolucaoCanal(chave='inexistente', erro='USERNAME_NOT_OCCUPIED', data_resolucao=agora - timedelta(hours=1))
+        falha_antiga = ResolucaoCanal(chave='https://t.me/+Abc', erro='PREVIA_SEM_ID', data_resolucao=agora - TTL_CACHE_NEGATIVO - timedelta(hours=1))
+
+        self.assertTrue(resolucao_valida(sucesso, agora))
+        self.assertTrue(resolucao_valida(falha_recente, agora))
+        self.assertFalse(resolucao_valida(falha_antiga, agora))
+        self.assertFalse(resolucao_valida(None, agora))
+
+    def test_canal_renomeado_e_atualizado_pelo_telegram_id(self):
+        canal = CanalTelegram.objects.create(nome='Canal', username='nome_antigo', telegram_id=-1001)
+        resolucao = ResolucaoCanal.objects.create(chave='nome_novo', telegram_id=-1001, username='nome_novo', titulo='Canal')
+
+        status = ImportarCanaisCommand()._registrar_canal('nome_novo', resolucao)
+
+        self.assertEqual(status, 'atualizado')
+        self.assertEqual(CanalTelegram.objects.count(), 1)
+        canal.refresh_from_db()
+        self.assertEqual(canal.username, 'nome_novo')
+        self.assertEqual(ImportarCanaisCommand()._registrar_canal('nome_novo', resolucao), 'existente')
+
+    def test_canal_novo_homonimo_recebe_o_id_no_nome(self):
+        CanalTelegram.objects.create(nome='Notícias', telegram_id=-1001)
+        resolucao = ResolucaoCanal.objects.create(chave='https://t.me/+Abc', telegram_id=-1002, titulo='Notícias')
+
+        self.assertEqual(ImportarCanaisCommand()._registrar_canal('https://t.me/+Abc', resolucao), 'criado')
+
+        canal = CanalTelegram.objects.get(telegram_id=-1002)
+        self.assertEqual(canal.nome, 'Notícias (-1002)')
+        self.assertEqual(canal.link_convite, 'https://t.me/+Abc')
+
+
+class ClienteResolucaoFalso:
+    """
+    Substitui o Client do Pyrogram no importar_canais, contando as chamadas a get_chat.
+    """
+    chamadas = Counter()
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    async def get_chat(self, chave):
+        self.chamadas[chave] += 1
+        if chave == 'canal_dois' and self.chamadas[chave] == 1:
+            raise FloodWait(value=0)
+        if chave == 'inexistente':
+            raise UsernameNotOccupied()
+        if chave == 'instavel':
+            raise ConnectionError("timeout")
+        telegram_id = {'canal_um': -1001, 'canal_dois': -1002}[chave]
+        return SimpleNamespace(id=telegram_id, username=chave.title(), title=f"Título {chave}")
+
+
+class ImportarCanaisCommandTests(TestCase):
+    """
+    Fluxo completo do comando importar_canais, com o Client do Pyrogram substituído.
+    """
+
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.arquivo = os.path.join(tmp_dir.name, 'canais.txt')
+        with open(self.arquivo, 'w', encoding='utf-8') as f:
+            f.write("# lista de teste\n@Canal_Um\nhttps://t.me/canal_um\ncanal_dois\ninexistente\ninstavel\n12345\n")
+        ClienteResolucaoFalso.chamadas = Counter()
+        patcher = mock.patch.object(importar_canais, 'Client', ClienteResolucaoFalso)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _importar(self):
+        stdout = StringIO()
+        call_command('importar_canais', self.arquivo, '--intervalo', '0', stdout=stdout, stderr=StringIO())
+        return stdout.getvalue()
+
+    def test_importacao_resolve_e_usa_o_cache(self):
+        saida = self._importar()
+
+        # Entradas duplicadas viram uma consulta; o FloodWait é aguardado e repetido
+        self.assertEqual(ClienteResolucaoFalso.chamadas, Counter({'canal_um': 1, 'canal_dois': 2, 'inexistente': 1, 'instavel': 1}))
+        self.assertIn("2 canais criados", saida)
+        self.assertIn("1 entradas inválidas", saida)
+        self.assertEqual(
+            sorted(CanalTelegram.objects.values_list('telegram_id', 'username')),
+            [(-1002, 'Canal_Dois'), (-1001, 'Canal_Um')],
+        )
+
+        # BadRequest fica em cache como erro; falha temporária não entra no cache
+        self.assertEqual(ResolucaoCanal.objects.get(chave='inexistente').erro, 'USERNAME_NOT_OCCUPIED')
+        self.assertFalse(ResolucaoCanal.objects.filter(chave='instavel').exists())
+
+        # Segunda importação: só a falha temporária volta a consultar a API
+        ClienteResolucaoFalso.chamadas = Counter()
+        saida = self._importar()
+        self.assertEqual(ClienteResolucaoFalso.chamadas, Counter({'instavel': 1}))
+        self.assertIn("3 já resolvidas em cache, 1 a consultar", saida)
+        self.assertIn("2 já existentes", saida)
+        self.assertEqual(CanalTelegram.objects.count(), 2)
+
+    def test_cache_negativo_expirado_e_consultado_de_novo(self):
+        self._importar()
+        ResolucaoCanal.objects.filter(chave='inexistente').update(data_resolucao=timezone.now() - TTL_CACHE_NEGATIVO - timedelta(hours=1))
+
+        ClienteResolucaoFalso.chamadas = Counter()
+        self._importar()
+        self.assertEqual(ClienteResolucaoFalso.chamadas, Counter({'inexistente': 1, 'instavel': 1}))
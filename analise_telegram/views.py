@@ -1,7 +1,9 @@
 # analise_telegram/views.py
 from django.shortcuts import render
-from django.db.models import Count
+from django.db.models import Count, Max
 from django.core.paginator import Paginator
+from django.views.decorators.gzip import gzip_page
+from django.views.decorators.http import condition
 from datetime import datetime, timedelta
 from collections import Counter # Importar para contar palavras
 
@@ -57,16 +59,70 @@ def dashboard(request):
     }
     return render(request, 'analise_telegram/dashboard.html', context)
 
+def _carimbo_canais(campo):
+    """
+    Carimbo de versão da tabela de canais: muda quando um canal é incluído,
+    removido (via contagem) ou quando `campo` é alterado.
+    """
+    agregado = CanalTelegram.objects.aggregate(total=Count('id'), ultima_alteracao=Max(campo))
+    ultima_alteracao = agregado['ultima_alteracao']
+    return f"{agregado['total']}-{ultima_alteracao.timestamp() if ultima_alteracao else 0}"
+
+def _carimbo_mensagens():
+    """
+    Carimbo de versão da tabela de mensagens. Usa apenas MAX sobre colunas
+    indexadas (uma contagem percorreria o índice inteiro da tabela); remoções
+    são percebidas pelo carimbo de cadastro dos canais (ver signals.py).
+    """
+    agregado = MensagemTelegram.objects.aggregate(ultimo_id=Max('id'), ultima_alteracao=Max('atualizado_em'))
+    ultima_alteracao = agregado['ultima_alteracao']
+    return f"{agregado['ultimo_id'] or 0}-{ultima_alteracao.timestamp() if ultima_alteracao else 0}"
+
+def _versao_canais(request):
+    """
+    Versão completa da tabela de canais (muda a cada coleta, pois a lista exibe
+    o último processamento), calculada uma única vez por requisição.
+    """
+    if not hasattr(request, '_versao_canais'):
+        request._versao_canais = _carimbo_canais('atualizado_em')
+    return request._versao_canais
+
+def _versao_cadastro_canais(request):
+    """
+    Versão do cadastro de canais (ids e nomes), usada pelo filtro de canais e
+    pela lista de mensagens: não muda quando o coletor processa um canal.
+    """
+    if not hasattr(request, '_versao_cadastro_canais'):
+        request._versao_cadastro_canais = _carimbo_canais('cadastro_alterado_em')
+    return request._versao_cadastro_canais
+
+def _etag_lista_canais(request):
+    # O menu do base.html muda conforme o usuário está autenticado ou não
+    return f"canais-{_versao_canais(request)}-{int(request.user.is_authenticated)}"
+
+def _etag_lista_mensagens(request):
+    etag = f"mensagens-{_versao_cadastro_canais(request)}-{_carimbo_mensagens()}-{int(request.user.is_authenticated)}"
+    # Filtros por período dependem da hora atual, não só dos dados
+    if request.GET.get('periodo'):
+        etag += f"-{datetime.now():%Y%m%d%H}"
+    return etag
+
+@gzip_page
+@condition(etag_func=_etag_lista_canais)
 def lista_canais(request):
     """
     Renderiza a lista de todos os canais monitorados.
+    A tabela é cacheada como fragmento, pela versão da tabela de canais.
     """
     canais = CanalTelegram.objects.all()
     context = {
-        'canais': canais
+        'canais': canais,
+        'versao_canais': _versao_canais(request),
     }
     return render(request, 'analise_telegram/lista_canais.html', context)
 
+@gzip_page
+@condition(etag_func=_etag_lista_mensagens)
 def lista_mensagens(request):
     """
     Renderiza a lista de mensagens coletadas com filtros e paginação.
@@ -103,8 +159,14 @@ def lista_mensagens(request):
 
     todos_canais = CanalTelegram.objects.all().order_by('nome')
 
+    # Filtros atuais (sem a página) montados uma vez para os links de paginação
+    filtros = request.GET.copy()
+    filtros.pop('page', None)
+
     context = {
         'mensagens': mensagens,
-        'todos_canais': todos_canais, # Para o dropdown de filtro
+        'todos_canais': todos_canais, # Para o dropdown de filtro (cacheado no template)
+        'versao_cadastro_canais': _versao_cadastro_canais(request),
+        'filtros_query': filtros.urlencode(),
     }
     return render(request, 'analise_telegram/lista_mensagens.html', context)
\ No newline at end of file
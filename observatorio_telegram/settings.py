@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -30,24 +31,6 @@ ALLOWED_HOSTS = []
 
 # Application definition
 
-# observatorio_telegram/settings.py
-
-# ... outras configurações ...
-
-# DATABASES = {
-#     'default': {
-#         'ENGINE': 'django.db.backends.mysql',
-#         'NAME': 'observatorio_telegram_db',  # Nome do seu banco de dados MySQL
-#         'USER': 'seu_usuario_mysql',         # Seu usuário do MySQL
-#         'PASSWORD': 'sua_senha_mysql',       # Sua senha do MySQL
-#         'HOST': 'localhost',                 # Ou o IP do seu servidor MySQL
-#         'PORT': '3306',                      # Porta padrão do MySQL
-#         'OPTIONS': {
-#             'init_command': "SET sql_mode='STRICT_TRANS_TABLES'",
-#         }
-#     }
-# }
-
 # Adicione o seu novo app 'analise_telegram' à lista de INSTALLED_APPS
 INSTALLED_APPS = [
     'django.contrib.admin',
@@ -93,12 +76,72 @@ WSGI_APPLICATION = 'observatorio_telegram.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# O backend é escolhido por variáveis de ambiente. Sem DB_ENGINE=mysql, o projeto
+# usa SQLite em modo WAL (desenvolvimento e testes locais), que permite leituras
+# do dashboard em paralelo com as escritas do coletor e da análise.
+DB_ENGINE = os.environ.get('DB_ENGINE', 'sqlite')
+
+# Papel do processo: 'web' (views, leem da réplica se houver) ou 'ingestao'
+# (coletor e análise de IA, que leem e escrevem sempre no primário).
+DB_ROLE = os.environ.get('DB_ROLE', 'web')
+
+if DB_ENGINE == 'mysql':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.mysql',
+            'NAME': os.environ.get('DB_NAME', 'observatorio_telegram_db'),
+            'USER': os.environ.get('DB_USER', ''),
+            'PASSWORD': os.environ.get('DB_PASSWORD', ''),
+            'HOST': os.environ.get('DB_HOST', 'localhost'),
+            'PORT': os.environ.get('DB_PORT', '3306'),
+            # Conexões persistentes: cada worker reaproveita a conexão entre requisições
+            'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', '600')),
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {
+                'init_command': "SET sql_mode='STRICT_TRANS_TABLES'",
+                'charset': 'utf8mb4',
+            },
+        }
+    }
+
+    # Réplica de leitura opcional, usada pelas views através do DATABASE_ROUTERS abaixo
+    if os.environ.get('DB_REPLICA_HOST'):
+        DATABASES['replica'] = {
+            **DATABASES['default'],
+            'HOST': os.environ['DB_REPLICA_HOST'],
+            'PORT': os.environ.get('DB_REPLICA_PORT', DATABASES['default']['PORT']),
+            'USER': os.environ.get('DB_REPLICA_USER', DATABASES['default']['USER']),
+            'PASSWORD': os.environ.get('DB_REPLICA_PASSWORD', DATABASES['default']['PASSWORD']),
+            # Nos testes a réplica aponta para o mesmo banco do primário
+            'TEST': {'MIRROR': 'default'},
+        }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get('DB_NAME', BASE_DIR / 'db.sqlite3'),
+            'OPTIONS': {
+                'init_command': 'PRAGMA journal_mode=WAL; PRAGMA synchronous=NORMAL;',
+                'transaction_mode': 'IMMEDIATE',
+                'timeout': 20,
+            },
+        }
     }
-}
+
+DATABASE_ROUTERS = ['analise_telegram.routers.PrimaryReplicaRouter']
+
+
+# Credenciais da API do Telegram (https://my.telegram.org), usadas pelo coletor
+# e pelo comando importar_canais. Defina-as por variáveis de ambiente.
+TELEGRAM_API_ID = int(os.environ.get('TELEGRAM_API_ID', '1234567'))
+TELEGRAM_API_HASH = os.environ.get('TELEGRAM_API_HASH', 'sua_api_hash_aqui')
+
+# Nome da sessão do Pyrogram (arquivo <nome>.session com a autenticação)
+TELEGRAM_SESSION_NAME = os.environ.get('TELEGRAM_SESSION_NAME', 'observatorio_session')
+
+# Armazenamento local das mídias baixadas pelo coletor (endereçado por conteúdo).
+# Caminho fixo, independente do diretório de onde o coletor é executado.
+MIDIA_DIR = Path(os.environ.get('MIDIA_DIR', BASE_DIR / 'midia'))
 
 
 # Password validation